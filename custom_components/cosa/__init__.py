@@ -2,23 +2,41 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import timedelta
-from typing import Any, Optional
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
+from homeassistant.const import CONF_TOKEN, Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import CosaAPI, CosaAPIError
-from .const import DOMAIN, UPDATE_INTERVAL
+from .api import CosaAPI, CosaAPIError, CosaAuthError, CosaResponseError
+from .const import (
+    DOMAIN,
+    FORECAST_UPDATE_INTERVAL,
+    UPDATE_INTERVAL,
+    UPDATE_INTERVAL_IDLE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.CLIMATE, Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SWITCH, Platform.NUMBER]
 
+# Preset adı -> (endpoint anahtarı, varsayılan sıcaklık)
+_TARGET_TEMPERATURE_KEYS = (
+    ("home", "homeTemperature", 21.0),
+    ("away", "awayTemperature", 18.0),
+    ("sleep", "sleepTemperature", 19.0),
+    ("custom", "customTemperature", 22.0),
+)
+
+# Art arda gelen mod/sıcaklık değişikliklerinin birleştirileceği süre (saniye)
+_WRITE_BATCH_DELAY = 0.2
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Entegrasyonu kur."""
@@ -27,35 +45,109 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     session = async_get_clientsession(hass)
     api = CosaAPI(session)
     
-    # Login
     email = entry.data.get("email")
     password = entry.data.get("password")
     
-    login_result = await api.login(email, password)
-    if not login_result.get("ok"):
-        _LOGGER.error("COSA login başarısız")
-        return False
+    def _store_token(new_token: str) -> None:
+        """Yeniden başlatmada login gerekmemesi için token'ı kayda yaz."""
+        if new_token and entry.data.get(CONF_TOKEN) != new_token:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_TOKEN: new_token}
+            )
+    
+    # Kayıtlı token varsa login atlanır; süresi dolmuşsa (401) ilk güncellemede yenilenir
+    token = entry.data.get(CONF_TOKEN)
+    stored_token = bool(token)
+    if not token:
+        login_result = await api.login(email, password)
+        if not login_result.get("ok"):
+            raise ConfigEntryAuthFailed(f"COSA login başarısız: {login_result.get('code')}")
+        
+        token = login_result.get("token")
+        _store_token(token)
     
-    token = login_result.get("token")
     endpoint_id = entry.data.get("endpoint_id")
+    relogin_lock = asyncio.Lock()
+    credentials_rejected = False
+    
+    async def _async_relogin() -> None:
+        """Süresi dolan token'ı yenile."""
+        nonlocal token, credentials_rejected
+        # Reddedilen bilgilerle tekrar denemek hesabı kilitleyebilir; entry yeniden yüklenene kadar bekle
+        if credentials_rejected:
+            raise ConfigEntryAuthFailed("COSA kimlik bilgileri reddedildi")
+        login_result = await api.login(email, password)
+        if not login_result.get("ok"):
+            credentials_rejected = True
+            raise ConfigEntryAuthFailed(f"Yeniden giriş başarısız: {login_result.get('code')}")
+        token = login_result.get("token")
+        _store_token(token)
+        coordinator.token = token
+        if entry.entry_id in hass.data[DOMAIN]:
+            hass.data[DOMAIN][entry.entry_id]["token"] = token
+    
+    async def _with_auth_retry(factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Yetki hatasında yeniden giriş yapıp isteği bir kez tekrarla."""
+        used_token = token
+        try:
+            return await factory()
+        except CosaAuthError:
+            _LOGGER.debug("COSA token geçersiz, yeniden giriş yapılıyor")
+            async with relogin_lock:
+                # Eşzamanlı istekler aynı token için tek giriş yapar
+                if token == used_token:
+                    await _async_relogin()
+            return await factory()
+    
+    last_update_error: Optional[CosaAPIError] = None
+    place_id: Optional[str] = None
+    forecast_cache: dict[str, Any] = {}
+    forecast_deadline = 0.0
+    
+    async def _fetch_forecast(place: Optional[str]) -> dict[str, Any]:
+        """Konum biliniyorsa hava durumunu al; süre dolana kadar önbellekten döndür."""
+        nonlocal forecast_cache, forecast_deadline
+        if not place:
+            return {}
+        if monotonic() < forecast_deadline:
+            return forecast_cache
+        
+        forecast = await api.get_forecast(place, token)
+        # Başarısız olursa eski veri korunur ve sonraki güncellemede tekrar denenir
+        if forecast:
+            forecast_cache = forecast
+            forecast_deadline = monotonic() + FORECAST_UPDATE_INTERVAL.total_seconds()
+        return forecast_cache
     
     async def async_update_data():
         """Veriyi API'den al."""
+        nonlocal place_id, forecast_cache, forecast_deadline, last_update_error
         try:
-            endpoint = await api.get_endpoint_detail(endpoint_id, token)
+            # Bağımsız istekleri aynı anda gönder
+            endpoint, reports, forecast = await _with_auth_retry(
+                lambda: asyncio.gather(
+                    api.get_endpoint_detail(endpoint_id, token),
+                    api.get_reports(endpoint_id, token),
+                    _fetch_forecast(place_id),
+                )
+            )
             
-            forecast = {}
-            reports = {}
-            place_id = endpoint.get("place")
-            if place_id:
-                forecast = await api.get_forecast(place_id, token)
+            # Konum ilk kez öğrenildiyse veya değiştiyse hava durumunu yeniden al
+            if endpoint.get("place") != place_id:
+                place_id = endpoint.get("place")
+                forecast_cache = {}
+                forecast_deadline = 0.0
+                forecast = await _fetch_forecast(place_id)
             
-            # Rapor verilerini al
-            reports = await api.get_reports(endpoint_id, token)
+            # Kombi çalışırken sık, boştayken seyrek güncelle
+            coordinator.update_interval = (
+                UPDATE_INTERVAL if endpoint.get("combiState") == "on" else UPDATE_INTERVAL_IDLE
+            )
             
             return {"endpoint": endpoint, "forecast": forecast, "reports": reports}
             
         except CosaAPIError as err:
+            last_update_error = err
             raise UpdateFailed(f"API hatası: {err}") from err
     
     coordinator = DataUpdateCoordinator(
@@ -66,7 +158,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         update_interval=UPDATE_INTERVAL,
     )
     
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except ConfigEntryNotReady:
+        # API süresi dolan token'ı 401 yerine ok=0 ile bildirebilir; bağlantı,
+        # 5xx veya zaman aşımı hatalarında yeniden giriş yapılmaz
+        if not stored_token or not isinstance(last_update_error, CosaResponseError):
+            raise
+        _LOGGER.debug("Kayıtlı COSA token reddedildi, yeniden giriş yapılıyor")
+        try:
+            await _async_relogin()
+        except CosaAPIError as err:
+            raise ConfigEntryNotReady(f"API hatası: {err}") from err
+        await coordinator.async_config_entry_first_refresh()
     
     # Coordinator'a yardımcı metodlar ekle
     coordinator.api = api
@@ -96,76 +200,117 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator._get_current_calibration = _get_current_calibration
     coordinator._is_open_window_enabled = _is_open_window_enabled
     
+    pending_writes: dict[str, tuple] = {}
+    flush_task: Optional[asyncio.Task] = None
+    
+    async def _flush_pending_writes() -> bool:
+        """Bekleyen mod ve sıcaklık değişikliklerini birlikte gönder."""
+        nonlocal flush_task
+        await asyncio.sleep(_WRITE_BATCH_DELAY)
+        writes = dict(pending_writes)
+        pending_writes.clear()
+        flush_task = None
+        
+        calls = []
+        if "mode" in writes:
+            calls.append(_with_auth_retry(
+                lambda: api.set_mode(endpoint_id, *writes["mode"], token)
+            ))
+        if "temperatures" in writes:
+            calls.append(_with_auth_retry(
+                lambda: api.set_target_temperatures(endpoint_id, *writes["temperatures"], token)
+            ))
+        
+        # Bir isteğin hatası diğerinin sonucunu ve yenilemeyi engellememeli
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if any(result is True for result in results):
+            await coordinator.async_request_refresh()
+        if errors:
+            raise errors[0]
+        return all(results)
+    
+    def _queue_write(key: str, args: tuple) -> asyncio.Task:
+        """Değişikliği kuyruğa ekle ve ortak gönderim görevini döndür."""
+        nonlocal flush_task
+        pending_writes[key] = args
+        if flush_task is None:
+            flush_task = hass.async_create_task(_flush_pending_writes())
+        return flush_task
+    
     async def async_set_mode(mode: str, option: Optional[str] = None) -> bool:
         """Mod değiştir."""
-        result = await api.set_mode(endpoint_id, mode, option, token)
-        if result:
-            await coordinator.async_request_refresh()
-        return result
+        # Ortak görev, bir çağıranın iptal edilmesiyle iptal olmamalı
+        return await asyncio.shield(_queue_write("mode", (mode, option)))
     
     async def async_set_temperatures(home: float, away: float, sleep: float, custom: float) -> bool:
         """Tüm sıcaklıkları ayarla."""
-        result = await api.set_target_temperatures(endpoint_id, home, away, sleep, custom, token)
-        if result:
-            await coordinator.async_request_refresh()
-        return result
+        return await asyncio.shield(_queue_write("temperatures", (home, away, sleep, custom)))
     
     async def async_set_preset_temperature(preset: str, temperature: float) -> bool:
         """Preset sıcaklığını ayarla."""
         endpoint = coordinator.data.get("endpoint", {}) if coordinator.data else {}
         
         temps = {
-            "home": endpoint.get("homeTemperature", 21.0),
-            "away": endpoint.get("awayTemperature", 18.0),
-            "sleep": endpoint.get("sleepTemperature", 19.0),
-            "custom": endpoint.get("customTemperature", 22.0),
+            name: endpoint.get(key, default)
+            for name, key, default in _TARGET_TEMPERATURE_KEYS
         }
         temps[preset] = temperature
         
-        result = await api.set_target_temperatures(
-            endpoint_id,
-            temps["home"], temps["away"], temps["sleep"], temps["custom"],
-            token
+        result = await _with_auth_retry(
+            lambda: api.set_target_temperatures(
+                endpoint_id,
+                temps["home"], temps["away"], temps["sleep"], temps["custom"],
+                token
+            )
         )
         if result:
             await coordinator.async_request_refresh()
         return result
     
-    async def async_set_child_lock(enabled: bool) -> bool:
-        """Çocuk kilidini ayarla."""
-        heating = _is_heating_on()
-        result = await api.set_combi_settings(endpoint_id, enabled, heating, token)
+    async def _async_write_settings(factory: Callable[[], Awaitable[bool]]) -> bool:
+        """Ayar isteğini token yenilemeli gönder ve başarılıysa yenile."""
+        try:
+            result = await _with_auth_retry(factory)
+        except (CosaAPIError, ConfigEntryAuthFailed) as err:
+            _LOGGER.error("COSA ayarı gönderilemedi: %s", err)
+            return False
         if result:
             await coordinator.async_request_refresh()
         return result
     
+    async def async_set_child_lock(enabled: bool) -> bool:
+        """Çocuk kilidini ayarla."""
+        heating = _is_heating_on()
+        return await _async_write_settings(
+            lambda: api.set_combi_settings(endpoint_id, enabled, heating, token)
+        )
+    
     async def async_set_open_window(enabled: bool) -> bool:
         """Açık pencere algılama özelliğini ayarla."""
         calibration = _get_current_calibration()
-        result = await api.set_device_settings(
-            endpoint_id, 
-            calibration, 
-            open_window_enable=enabled,
-            open_window_duration=30,
-            token=token
+        return await _async_write_settings(
+            lambda: api.set_device_settings(
+                endpoint_id, 
+                calibration, 
+                open_window_enable=enabled,
+                open_window_duration=30,
+                token=token
+            )
         )
-        if result:
-            await coordinator.async_request_refresh()
-        return result
     
     async def async_set_calibration(value: float) -> bool:
         """Kalibrasyonu ayarla."""
         open_window_enabled = _is_open_window_enabled()
-        result = await api.set_device_settings(
-            endpoint_id, 
-            value, 
-            open_window_enable=open_window_enabled,
-            open_window_duration=30,
-            token=token
+        return await _async_write_settings(
+            lambda: api.set_device_settings(
+                endpoint_id, 
+                value, 
+                open_window_enable=open_window_enabled,
+                open_window_duration=30,
+                token=token
+            )
         )
-        if result:
-            await coordinator.async_request_refresh()
-        return result
     
     coordinator.async_set_mode = async_set_mode
     coordinator.async_set_temperatures = async_set_temperatures
@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import random
+from collections.abc import Mapping
+from time import monotonic
 from typing import Any, Optional
 
 import aiohttp
+import orjson
 
 from .const import (
     API_BASE_URL,
@@ -18,6 +24,7 @@ from .const import (
     ENDPOINT_GET_FORECAST,
     ENDPOINT_SET_COMBI_SETTINGS,
     ENDPOINT_SET_DEVICE_SETTINGS,
+    ENDPOINT_GET_REPORTS,
     HEADER_USER_AGENT,
     HEADER_CONTENT_TYPE,
     HEADER_PROVIDER,
@@ -25,6 +32,30 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Her istekte yeniden oluşturulmaması için sabit timeout ve header'lar
+_DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=API_TIMEOUT)
+_BASE_HEADERS: dict[str, str] = {
+    "User-Agent": HEADER_USER_AGENT,
+    "Content-Type": HEADER_CONTENT_TYPE,
+    "provider": HEADER_PROVIDER,
+    "Accept": "*/*",
+}
+
+# Parametresiz istekler için önceden serileştirilmiş gövde
+_EMPTY_BODY = b"{}"
+
+# get_endpoints sonuçlarının önbellekte tutulacağı süre (saniye)
+_ENDPOINTS_CACHE_TTL = 60
+
+# Geçici hatalarda tekrar deneme ayarları
+_MAX_RETRIES = 2
+_RETRY_BASE_DELAY = 0.5
+_RETRY_STATUSES = frozenset({502, 503, 504})
+
+# Art arda bu kadar başarısız istekten sonra API'ye bir süre istek gönderilmez
+_BREAKER_THRESHOLD = 3
+_BREAKER_COOLDOWN = 30
+
 
 class CosaAPIError(Exception):
     """COSA API hatası."""
@@ -36,13 +67,43 @@ class CosaAuthError(CosaAPIError):
     pass
 
 
+class CosaResponseError(CosaAPIError):
+    """API'nin ok=0 ile bildirdiği hata."""
+    pass
+
+
+def _loads(body: bytes) -> dict[str, Any]:
+    """Yanıt gövdesini JSON olarak ayrıştır."""
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError as err:
+        raise aiohttp.ClientPayloadError(f"Geçersiz JSON yanıtı: {err}") from err
+
+
 class CosaAPI:
     """COSA Termostat API İstemcisi."""
 
+    __slots__ = (
+        "_session",
+        "_own_session",
+        "_token",
+        "_detail_cache",
+        "_endpoints_cache",
+        "_cb_failures",
+        "_cb_open_until",
+    )
+
     def __init__(self, session: Optional[aiohttp.ClientSession] = None) -> None:
         self._session = session
         self._own_session = False
         self._token: Optional[str] = None
+        # endpoint_id -> (etag, gövde özeti, ayrıştırılmış endpoint)
+        self._detail_cache: dict[str, tuple[Optional[str], bytes, dict[str, Any]]] = {}
+        # token -> (zaman damgası, endpoint listesi)
+        self._endpoints_cache: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+        # Devre kesici durumu
+        self._cb_failures = 0
+        self._cb_open_until = 0.0
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Session al veya oluştur."""
@@ -58,133 +119,216 @@ class CosaAPI:
             self._session = None
 
     def _get_base_headers(self) -> dict[str, str]:
-        return {
-            "User-Agent": HEADER_USER_AGENT,
-            "Content-Type": HEADER_CONTENT_TYPE,
-            "provider": HEADER_PROVIDER,
-            "Accept": "*/*",
-        }
+        # Paylaşılan sözlük; çağıranlar değiştirmemeli
+        return _BASE_HEADERS
 
     def _get_auth_headers(self, token: Optional[str] = None) -> dict[str, str]:
-        headers = self._get_base_headers()
         use_token = token or self._token
         if use_token:
-            headers["authtoken"] = use_token
-        return headers
+            return {**_BASE_HEADERS, "authtoken": use_token}
+        return _BASE_HEADERS
 
-    async def login(self, email: str, password: str) -> dict[str, Any]:
-        """Login ve token al."""
+    def _record_failure(self) -> None:
+        """Başarısız isteği say ve eşik aşılırsa devre kesiciyi aç."""
+        self._cb_failures += 1
+        if self._cb_failures >= _BREAKER_THRESHOLD:
+            _LOGGER.warning(
+                "COSA API art arda %s kez yanıt vermedi, %s saniye beklenecek",
+                self._cb_failures, _BREAKER_COOLDOWN,
+            )
+            # Sayaç sıfırlanmaz; bekleme sonrası ilk hata kesiciyi yeniden açar
+            self._cb_open_until = monotonic() + _BREAKER_COOLDOWN
+
+    async def _request(
+        self, path: str, payload: Any, headers: Mapping[str, str], retries: int = _MAX_RETRIES
+    ) -> tuple[int, Mapping[str, str], bytes]:
+        """POST isteği gönder; bağlantı ve 502/503/504 hatalarında jitter'lı üstel bekleme ile tekrar dene."""
+        if monotonic() < self._cb_open_until:
+            raise CosaAPIError("API geçici olarak devre dışı (devre kesici açık)")
+        
         session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_LOGIN}"
-        payload = {"email": email, "password": password}
+        url = f"{API_BASE_URL}{path}"
+        data = payload if isinstance(payload, bytes) else orjson.dumps(payload)
         
+        attempt = 0
+        while True:
+            try:
+                async with session.post(
+                    url, data=data, headers=headers, timeout=_DEFAULT_TIMEOUT,
+                ) as response:
+                    status = response.status
+                    if status not in _RETRY_STATUSES or attempt >= retries:
+                        body = await response.read()
+                        # Tüm 5xx yanıtları devre kesici için başarısız sayılır
+                        if status >= 500:
+                            self._record_failure()
+                        else:
+                            self._cb_failures = 0
+                        return status, response.headers, body
+                    _LOGGER.debug("%s geçici hata: %s", path, status)
+            except asyncio.TimeoutError:
+                # Zaman aşımı tekrarlanmaz; aksi halde tek çağrı dakikalarca sürebilir
+                self._record_failure()
+                raise
+            except aiohttp.ClientConnectionError as err:
+                if attempt >= retries:
+                    self._record_failure()
+                    raise
+                _LOGGER.debug("%s bağlantı hatası: %s", path, err)
+            
+            await asyncio.sleep(random.uniform(0, _RETRY_BASE_DELAY * 2 ** attempt))
+            attempt += 1
+
+    async def _post_json(
+        self,
+        path: str,
+        payload: Any,
+        *,
+        token: Optional[str] = None,
+        auth: bool = True,
+        log_response: bool = True,
+    ) -> dict[str, Any]:
+        """JSON POST isteği gönder ve ayrıştırılmış yanıtı döndür."""
+        headers = self._get_auth_headers(token) if auth else self._get_base_headers()
         try:
-            async with session.post(
-                url, json=payload, headers=self._get_base_headers(),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                
-                if data.get("ok") == 0:
-                    error_code = data.get("code", "unknown")
-                    return {"ok": False, "code": error_code}
-                
-                token = data.get("authToken")
-                if token:
-                    self._token = token
-                
-                return {"ok": True, "token": token}
-                
+            status, _, body = await self._request(path, payload, headers)
+            # 200 en sık durum; diğerleri tek dalda ele alınır
+            if status != 200:
+                if status == 401:
+                    raise CosaAuthError(f"Yetkisiz istek: {path}")
+                if status >= 500:
+                    raise CosaAPIError(f"Sunucu hatası: {status}")
+                # 4xx yanıtlarında API hata ayrıntısını gövdedeki "ok"/"code" alanlarıyla bildirir
+                _LOGGER.debug("%s beklenmeyen durum kodu: %s", path, status)
+            data = _loads(body)
         except aiohttp.ClientError as err:
             raise CosaAPIError(f"Bağlantı hatası: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise CosaAPIError(f"Zaman aşımı: {path}") from err
+        
+        if log_response:
+            _LOGGER.debug("%s yanıtı: %s", path, data)
+        return data
+
+    async def login(self, email: str, password: str) -> dict[str, Any]:
+        """Login ve token al."""
+        try:
+            data = await self._post_json(
+                ENDPOINT_LOGIN, {"email": email, "password": password},
+                auth=False, log_response=False,  # Yanıt token içerir
+            )
+        except CosaAuthError:
+            # Hatalı kimlik bilgisi bağlantı hatası değildir
+            return {"ok": False, "code": 401}
+        
+        if data.get("ok") == 0:
+            return {"ok": False, "code": data.get("code", "unknown")}
+        
+        token = data.get("authToken")
+        if token:
+            self._token = token
+        
+        return {"ok": True, "token": token}
 
     async def get_endpoints(self, token: Optional[str] = None) -> list[dict[str, Any]]:
         """Endpoint listesini al."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_GET_ENDPOINTS}"
+        cache_key = token or self._token or ""
+        
+        cached = self._endpoints_cache.get(cache_key)
+        if cached is not None and monotonic() - cached[0] < _ENDPOINTS_CACHE_TTL:
+            return cached[1]
         
         try:
-            async with session.post(
-                url, json={}, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                
-                if data.get("ok") == 0:
-                    return []
-                
-                return data.get("endpoints", [])
-                
-        except aiohttp.ClientError as err:
-            raise CosaAPIError(f"Bağlantı hatası: {err}") from err
+            data = await self._post_json(ENDPOINT_GET_ENDPOINTS, _EMPTY_BODY, token=token)
+        except CosaAuthError:
+            self._endpoints_cache.pop(cache_key, None)
+            raise
+        
+        if data.get("ok") == 0:
+            # Token geçersiz olabilir, önbelleği temizle
+            self._endpoints_cache.pop(cache_key, None)
+            return []
+        
+        endpoints = data.get("endpoints", [])
+        self._endpoints_cache[cache_key] = (monotonic(), endpoints)
+        return endpoints
 
     async def get_endpoint_detail(self, endpoint_id: str, token: Optional[str] = None) -> dict[str, Any]:
         """Endpoint detaylarını al."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_GET_ENDPOINT}"
         payload = {"endpoint": endpoint_id}
+        headers = self._get_auth_headers(token)
+        cached = self._detail_cache.get(endpoint_id)
+        conditional = cached is not None and bool(cached[0])
+        if conditional:
+            headers = {**headers, "If-None-Match": cached[0]}
         
         try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                
-                if data.get("ok") == 0:
-                    raise CosaAPIError(f"API hatası: {data.get('code')}")
-                
-                return data.get("endpoint", {})
-                
+            status, resp_headers, body = await self._request(
+                ENDPOINT_GET_ENDPOINT, payload, headers
+            )
+            if status != 200:
+                # Sunucu değişiklik olmadığını bildirdi, önbellekteki veriyi kullan.
+                # If-None-Match POST ile gönderildiğinden sunucu 304 yerine 412 dönebilir;
+                # koşulsuz istekte 412 ise gerçek bir hatadır.
+                if status == 304 and cached is not None or status == 412 and conditional:
+                    return cached[2]
+                if status == 401:
+                    self._detail_cache.pop(endpoint_id, None)
+                    raise CosaAuthError(f"Yetkisiz istek: {ENDPOINT_GET_ENDPOINT}")
+                # Hata gövdesi endpoint verisi içermez; önbelleğe yazılmamalı
+                raise CosaAPIError(f"Beklenmeyen durum kodu: {status}")
+            
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            etag = resp_headers.get("ETag")
+            
+            # ETag desteklenmese bile aynı gövdeyi tekrar ayrıştırma
+            if cached is not None and cached[1] == digest:
+                if etag != cached[0]:
+                    self._detail_cache[endpoint_id] = (etag, digest, cached[2])
+                return cached[2]
+            
+            data = _loads(body)
         except aiohttp.ClientError as err:
             raise CosaAPIError(f"Bağlantı hatası: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise CosaAPIError(f"Zaman aşımı: {ENDPOINT_GET_ENDPOINT}") from err
+        
+        if data.get("ok") == 0:
+            self._detail_cache.pop(endpoint_id, None)
+            raise CosaResponseError(f"API hatası: {data.get('code')}")
+        
+        endpoint = data.get("endpoint", {})
+        self._detail_cache[endpoint_id] = (etag, digest, endpoint)
+        return endpoint
 
     async def get_forecast(self, place_id: str, token: Optional[str] = None) -> dict[str, Any]:
         """Hava durumu tahminini al."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_GET_FORECAST}"
-        payload = {"place": place_id}
-        
         try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                
-                if data.get("ok") == 0:
-                    return {}
-                
-                # Forecast API yanıtı: {"place": ..., "currently": {...}, "hourly": [...], "daily": [...], "ok": 1}
-                _LOGGER.debug("Forecast verisi alındı - hourly: %s", bool(data.get("hourly")))
-                return data
-                
-        except aiohttp.ClientError:
+            # Büyük yanıt tamamen loglanmaz, aşağıda özeti loglanır
+            data = await self._post_json(
+                ENDPOINT_GET_FORECAST, {"place": place_id}, token=token, log_response=False
+            )
+        except CosaAPIError:
+            return {}
+        
+        if data.get("ok") == 0:
             return {}
+        
+        # Forecast API yanıtı: {"place": ..., "currently": {...}, "hourly": [...], "daily": [...], "ok": 1}
+        _LOGGER.debug("Forecast verisi alındı - hourly: %s", bool(data.get("hourly")))
+        return data
 
     async def set_mode(
         self, endpoint_id: str, mode: str, option: Optional[str] = None, token: Optional[str] = None
     ) -> bool:
         """Mod değiştir."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_SET_MODE}"
         payload: dict[str, Any] = {"endpoint": endpoint_id, "mode": mode}
         if option:
             payload["option"] = option
         
         _LOGGER.debug("set_mode payload: %s", payload)
-        
-        try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                _LOGGER.debug("set_mode response: %s", data)
-                return data.get("ok") == 1
-                
-        except aiohttp.ClientError as err:
-            raise CosaAPIError(f"Bağlantı hatası: {err}") from err
+        data = await self._post_json(ENDPOINT_SET_MODE, payload, token=token)
+        return data.get("ok") == 1
 
     async def set_target_temperatures(
         self, endpoint_id: str,
@@ -192,26 +336,14 @@ class CosaAPI:
         token: Optional[str] = None
     ) -> bool:
         """Hedef sıcaklıkları ayarla."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_SET_TARGET_TEMPERATURES}"
         payload = {
             "endpoint": endpoint_id,
             "targetTemperatures": {
                 "home": home, "away": away, "sleep": sleep, "custom": custom
             }
         }
-        
-        try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                _LOGGER.debug("set_target_temperatures response: %s", data)
-                return data.get("ok") == 1
-                
-        except aiohttp.ClientError as err:
-            raise CosaAPIError(f"Bağlantı hatası: {err}") from err
+        data = await self._post_json(ENDPOINT_SET_TARGET_TEMPERATURES, payload, token=token)
+        return data.get("ok") == 1
 
     async def set_combi_settings(
         self, endpoint_id: str, 
@@ -220,8 +352,6 @@ class CosaAPI:
         token: Optional[str] = None
     ) -> bool:
         """Kombi ayarlarını (çocuk kilidi, ısıtma) ayarla."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_SET_COMBI_SETTINGS}"
         payload = {
             "endpoint": endpoint_id,
             "combiSettings": {
@@ -231,19 +361,15 @@ class CosaAPI:
         }
         
         _LOGGER.debug("set_combi_settings payload: %s", payload)
-        
         try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                _LOGGER.debug("set_combi_settings response: %s", data)
-                return data.get("ok") == 1
-                
-        except aiohttp.ClientError as err:
+            data = await self._post_json(ENDPOINT_SET_COMBI_SETTINGS, payload, token=token)
+        except CosaAuthError:
+            # Token yenilemesi için çağırana bırakılır
+            raise
+        except CosaAPIError as err:
             _LOGGER.error("set_combi_settings error: %s", err)
             return False
+        return data.get("ok") == 1
 
     async def set_device_settings(
         self, endpoint_id: str, 
@@ -253,8 +379,6 @@ class CosaAPI:
         token: Optional[str] = None
     ) -> bool:
         """Cihaz ayarlarını (kalibrasyon, açık pencere) ayarla."""
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_SET_DEVICE_SETTINGS}"
         payload: dict[str, Any] = {
             "endpoint": endpoint_id,
             "calibration": calibration,
@@ -266,45 +390,33 @@ class CosaAPI:
                 payload["openWindowDuration"] = open_window_duration
         
         _LOGGER.debug("set_device_settings payload: %s", payload)
-        
         try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                _LOGGER.debug("set_device_settings response: %s", data)
-                return data.get("ok") == 1
-                
-        except aiohttp.ClientError as err:
+            data = await self._post_json(ENDPOINT_SET_DEVICE_SETTINGS, payload, token=token)
+        except CosaAuthError:
+            # Token yenilemesi için çağırana bırakılır
+            raise
+        except CosaAPIError as err:
             _LOGGER.error("set_device_settings error: %s", err)
             return False
+        return data.get("ok") == 1
 
     async def get_reports(self, endpoint_id: str, token: Optional[str] = None) -> dict[str, Any]:
         """Rapor verilerini al (son 24 saat)."""
-        from .const import ENDPOINT_GET_REPORTS
-        session = await self._get_session()
-        url = f"{API_BASE_URL}{ENDPOINT_GET_REPORTS}"
-        payload = {"endpoint": endpoint_id}
-        
         try:
-            async with session.post(
-                url, json=payload, headers=self._get_auth_headers(token),
-                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-            ) as response:
-                data = await response.json()
-                
-                if data.get("ok") == 0:
-                    _LOGGER.warning("Rapor verisi alınamadı")
-                    return {}
-                
-                
-                # API yanıtı: {"report": {"data": [...], "stats": {...}, "summary": {...}}, "ok": 1}
-                report = data.get("report", {})
-                _LOGGER.debug("Rapor verisi alındı - stats: %s, summary: %s", 
-                    bool(report.get("stats")), bool(report.get("summary")))
-                return report
-                
-        except aiohttp.ClientError as err:
+            # Büyük yanıt tamamen loglanmaz, aşağıda özeti loglanır
+            data = await self._post_json(
+                ENDPOINT_GET_REPORTS, {"endpoint": endpoint_id}, token=token, log_response=False
+            )
+        except CosaAPIError as err:
             _LOGGER.warning("Rapor verisi alınamadı: %s", err)
             return {}
+        
+        if data.get("ok") == 0:
+            _LOGGER.warning("Rapor verisi alınamadı")
+            return {}
+        
+        # API yanıtı: {"report": {"data": [...], "stats": {...}, "summary": {...}}, "ok": 1}
+        report = data.get("report", {})
+        _LOGGER.debug("Rapor verisi alındı - stats: %s, summary: %s", 
+            bool(report.get("stats")), bool(report.get("summary")))
+        return report
@@ -50,6 +50,26 @@ PRESET_TO_OPTION = {
     PRESET_MANUEL: OPTION_CUSTOM,
 }
 
+# API modundan preset'e dönüşüm (manuel mod option'a göre çözülür)
+MODE_TO_PRESET = {
+    MODE_SCHEDULE: PRESET_HAFTALIK,
+    MODE_AUTO: PRESET_OTOMATIK,
+}
+
+# Preset'ten API moduna dönüşüm (listede olmayanlar manuel moddur)
+PRESET_TO_MODE = {
+    PRESET_HAFTALIK: MODE_SCHEDULE,
+    PRESET_OTOMATIK: MODE_AUTO,
+}
+
+# Option -> (hedef sıcaklık anahtarı, endpoint anahtarı, varsayılan)
+OPTION_TO_TEMPERATURE = {
+    OPTION_HOME: ("home", "homeTemperature", 21),
+    OPTION_AWAY: ("away", "awayTemperature", 15),
+    OPTION_SLEEP: ("sleep", "sleepTemperature", 19),
+    OPTION_CUSTOM: ("custom", "customTemperature", 20),
+}
+
 # Preset İkonları
 PRESET_ICONS = {
     PRESET_EVDE: "mdi:home",
@@ -104,6 +124,9 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
         self._optimistic_target_temp: float | None = None
         self._optimistic_preset: str | None = None
         self._optimistic_hvac_mode: HVACMode | None = None
+        # extra_state_attributes önbelleği; coordinator verisi değişene kadar geçerli
+        self._attrs_cache_key: tuple[Any, str | None] | None = None
+        self._attrs_cache: dict[str, Any] = {}
 
     @property
     def _endpoint(self) -> dict:
@@ -124,7 +147,8 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
     @property
     def current_humidity(self) -> int | None:
         humidity = self._endpoint.get("humidity")
-        return round(humidity) if humidity else None
+        # Nem negatif olamaz; %0 değeri de geçerli bir ölçümdür
+        return None if humidity is None else int(humidity + 0.5)
 
     @property
     def target_temperature(self) -> float | None:
@@ -159,16 +183,10 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
         if self._optimistic_preset is not None:
             return self._optimistic_preset
             
-        mode = self._endpoint.get("mode")
-        option = self._endpoint.get("option")
-        
-        if mode == MODE_SCHEDULE:
-            return PRESET_HAFTALIK
-        elif mode == MODE_AUTO:
-            return PRESET_OTOMATIK
-        elif mode == MODE_MANUAL:
-            return OPTION_TO_PRESET.get(option, PRESET_EVDE)
-        return OPTION_TO_PRESET.get(option, PRESET_EVDE)
+        endpoint = self._endpoint
+        return MODE_TO_PRESET.get(endpoint.get("mode")) or OPTION_TO_PRESET.get(
+            endpoint.get("option"), PRESET_EVDE
+        )
 
     @property
     def icon(self) -> str:
@@ -211,13 +229,7 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
             self._optimistic_hvac_mode = None
         
         # Preset kontrolü
-        real_preset = None
-        if mode == MODE_SCHEDULE:
-            real_preset = PRESET_HAFTALIK
-        elif mode == MODE_AUTO:
-            real_preset = PRESET_OTOMATIK
-        else:
-            real_preset = OPTION_TO_PRESET.get(option, PRESET_EVDE)
+        real_preset = MODE_TO_PRESET.get(mode) or OPTION_TO_PRESET.get(option, PRESET_EVDE)
         
         if self._optimistic_preset is not None and real_preset == self._optimistic_preset:
             self._optimistic_preset = None
@@ -242,10 +254,9 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
         self._optimistic_hvac_mode = HVACMode.HEAT  # Preset seçildiğinde ısıtma açık
         self.async_write_ha_state()
         
-        if preset_mode == PRESET_HAFTALIK:
-            await self.coordinator.async_set_mode(MODE_SCHEDULE)
-        elif preset_mode == PRESET_OTOMATIK:
-            await self.coordinator.async_set_mode(MODE_AUTO)
+        mode = PRESET_TO_MODE.get(preset_mode)
+        if mode is not None:
+            await self.coordinator.async_set_mode(mode)
         else:
             option = PRESET_TO_OPTION.get(preset_mode, OPTION_HOME)
             await self.coordinator.async_set_mode(MODE_MANUAL, option)
@@ -259,25 +270,18 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
         self._optimistic_target_temp = temperature
         self.async_write_ha_state()
         
-        option = self._endpoint.get("option", OPTION_HOME)
+        endpoint = self._endpoint
+        option = endpoint.get("option", OPTION_HOME)
         
-        home = self._endpoint.get("homeTemperature", 21)
-        away = self._endpoint.get("awayTemperature", 15)
-        sleep = self._endpoint.get("sleepTemperature", 19)
-        custom = self._endpoint.get("customTemperature", 20)
-        
-        if option == OPTION_HOME:
-            home = temperature
-        elif option == OPTION_AWAY:
-            away = temperature
-        elif option == OPTION_SLEEP:
-            sleep = temperature
-        elif option == OPTION_CUSTOM:
-            custom = temperature
-        else:
-            home = temperature
+        temps = {
+            name: endpoint.get(key, default)
+            for name, key, default in OPTION_TO_TEMPERATURE.values()
+        }
+        # Bilinmeyen option'larda ev sıcaklığı güncellenir
+        name = OPTION_TO_TEMPERATURE.get(option, OPTION_TO_TEMPERATURE[OPTION_HOME])[0]
+        temps[name] = temperature
         
-        await self.coordinator.async_set_temperatures(home, away, sleep, custom)
+        await self.coordinator.async_set_temperatures(**temps)
 
     async def async_turn_on(self) -> None:
         await self.async_set_hvac_mode(HVACMode.HEAT)
@@ -287,15 +291,25 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
+        # Aynı veri nesnesi ve preset için önceki sonucu döndür
+        current_preset = self.preset_mode
+        cache_key = (self.coordinator.data, current_preset)
+        if (
+            self._attrs_cache_key is not None
+            and self._attrs_cache_key[0] is cache_key[0]
+            and self._attrs_cache_key[1] == current_preset
+        ):
+            return self._attrs_cache
+        
         device = self._endpoint.get("device", {})
         forecast_data = self._forecast.get("hourly", [{}])
         current_weather = forecast_data[0] if forecast_data else {}
         
         # Preset ikonu bilgisini ekle
-        current_preset = self.preset_mode
         preset_icon = PRESET_ICONS.get(current_preset, "mdi:thermostat")
         
-        return {
+        self._attrs_cache_key = cache_key
+        self._attrs_cache = {
             "mode": self._endpoint.get("mode"),
             "option": self._endpoint.get("option"),
             "combi_state": self._endpoint.get("combiState"),
@@ -314,3 +328,4 @@ class CosaClimate(CoordinatorEntity, ClimateEntity):
             "weather_icon": current_weather.get("icon"),
             "preset_icon": preset_icon,
         }
+        return self._attrs_cache
@@ -3,13 +3,15 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Mapping
 from typing import Any
 
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import CosaAPI
 from .const import DOMAIN, CONF_ENDPOINT_ID
@@ -28,6 +30,7 @@ class CosaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._password: str | None = None
         self._token: str | None = None
         self._endpoints: list[dict] = []
+        self._reauth_entry: config_entries.ConfigEntry | None = None
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -39,7 +42,7 @@ class CosaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             email = user_input[CONF_EMAIL]
             password = user_input[CONF_PASSWORD]
 
-            api = CosaAPI()
+            api = CosaAPI(async_get_clientsession(self.hass))
             try:
                 # Login
                 login_result = await api.login(email, password)
@@ -65,6 +68,7 @@ class CosaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                                     CONF_EMAIL: email,
                                     CONF_PASSWORD: password,
                                     CONF_ENDPOINT_ID: endpoint.get("id"),
+                                    CONF_TOKEN: self._token,
                                 },
                             )
                         else:
@@ -109,6 +113,7 @@ class CosaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_EMAIL: self._email,
                     CONF_PASSWORD: self._password,
                     CONF_ENDPOINT_ID: endpoint_id,
+                    CONF_TOKEN: self._token,
                 },
             )
 
@@ -126,3 +131,44 @@ class CosaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 }
             ),
         )
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> FlowResult:
+        """Kimlik bilgileri reddedildiğinde yeniden doğrulama başlat."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(
+            self.context["entry_id"]
+        )
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Yeni şifreyi al ve doğrula."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            api = CosaAPI(async_get_clientsession(self.hass))
+            try:
+                login_result = await api.login(
+                    self._reauth_entry.data[CONF_EMAIL], user_input[CONF_PASSWORD]
+                )
+            except Exception as ex:
+                _LOGGER.error("Login hatası: %s", ex)
+                errors["base"] = "cannot_connect"
+            else:
+                if not login_result.get("ok"):
+                    errors["base"] = "invalid_auth"
+                else:
+                    return self.async_update_reload_and_abort(
+                        self._reauth_entry,
+                        data={
+                            **self._reauth_entry.data,
+                            CONF_PASSWORD: user_input[CONF_PASSWORD],
+                            CONF_TOKEN: login_result.get("token"),
+                        },
+                    )
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_PASSWORD): str}),
+            errors=errors,
+        )
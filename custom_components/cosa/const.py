@@ -62,6 +62,10 @@ CALIBRATION_STEP = 0.1
 # Güncelleme Aralığı - 10 saniye
 SCAN_INTERVAL = timedelta(seconds=10)
 UPDATE_INTERVAL = timedelta(seconds=10)
+# Kombi çalışmıyorken kullanılan daha seyrek güncelleme aralığı
+UPDATE_INTERVAL_IDLE = timedelta(seconds=60)
+# Hava durumu saatlik değiştiği için daha seyrek alınır
+FORECAST_UPDATE_INTERVAL = timedelta(minutes=30)
 
 # Batarya Seviyeleri
 BATTERY_LEVELS = {